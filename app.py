@@ -1,14 +1,30 @@
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, Input, Output, State, no_update
 import plotly.express as px
 import pandas as pd
 
-from youtube_scraper import get_channel_videos
+from youtube_scraper import iter_channel_videos, channel_key
+from cache_store import store
+from datasets import registry
+from figure_cache import figures
+from jobs import jobs, DONE, FAILED
+from video_store import db
+from metrics import TOP_K, COUNT_COLUMNS
+import instrumentation
 
 app = dash.Dash(__name__)
 server = app.server   # REQUIRED for gunicorn
 
 
+@server.route("/metrics")
+def metrics():
+    # Timings/counters for this worker process (enable with YT_METRICS=1)
+    return {"enabled": instrumentation.ENABLED, **instrumentation.snapshot()}
+
+
+MAX_VIDEOS = 1000   # uploads scraped per channel (streamed in batches)
+
+
 # =========================
 # LAYOUT
 # =========================
@@ -33,7 +49,14 @@ app.layout = html.Div(
             ]
         ),
 
+        # Holds only the dataset key; frames live in the server-side registry
         dcc.Store(id="data-store"),
+        # Dataset version currently shown; changes as partial batches arrive
+        dcc.Store(id="data-version"),
+
+        # Background load job being polled (job id == channel key)
+        dcc.Store(id="job-store"),
+        dcc.Interval(id="job-poll", interval=1000, max_intervals=3600, disabled=True),
 
         # -------- CONTROLS --------
         html.Div(
@@ -94,6 +117,11 @@ app.layout = html.Div(
                     value="views",
                     clearable=False,
                     style={"maxWidth": "300px", "margin": "0 auto"}
+                ),
+
+                html.Div(
+                    id="load-status",
+                    style={"textAlign": "center", "color": "#6b7280", "marginTop": "12px"}
                 )
             ]
         ),
@@ -121,6 +149,27 @@ app.layout = html.Div(
                     children=[dcc.Graph(id="scatter-chart")]
                 ),
             ]
+        ),
+
+        # -------- COMPARISON --------
+        html.Div(
+            style={
+                "background": "white",
+                "borderRadius": "12px",
+                "padding": "20px",
+                "boxShadow": "0 6px 18px rgba(0,0,0,0.08)",
+                "marginTop": "20px"
+            },
+            children=[
+                html.H3("Compare Channels", style={"marginTop": "0"}),
+                dcc.Dropdown(
+                    id="compare-dropdown",
+                    multi=True,
+                    placeholder="Select previously loaded channels",
+                    style={"marginBottom": "12px"}
+                ),
+                dcc.Graph(id="compare-chart")
+            ]
         )
     ]
 )
@@ -128,57 +177,123 @@ app.layout = html.Div(
 # =========================
 # LOAD DATA
 # =========================
+@instrumentation.timed("app.load_channel")
+def _load_channel(channel_url):
+    """
+    Runs in a background job. Publishes the growing dataset to the
+    registry so polls can chart partial results, each time the row count
+    has doubled (total copying stays O(n)), then the cached channel.
+    An expired channel is refreshed incrementally. Returns the dataset
+    key, or None if the channel has no videos.
+    """
+    key = channel_key(channel_url)
+    refresh = "incremental" if store.expired(key) else False
+    batches = []
+    rows = published = 0
+
+    for batch, _, _ in iter_channel_videos(channel_url, max_results=MAX_VIDEOS, refresh=refresh):
+        if batch.empty:
+            continue
+        batches.append(batch)
+        rows += len(batch)
+
+        if rows >= 2 * published:
+            registry.put(key, pd.concat(batches, ignore_index=True))
+            published = rows
+
+    if not batches:
+        return None
+
+    # Incremental batches arrive cached rows first; the cache entry is in
+    # listing order and is what every other worker loads
+    if registry.load(key) is None:
+        registry.put(key, pd.concat(batches, ignore_index=True))
+    return key
+
+
 @app.callback(
-    Output("data-store", "data"),
+    Output("job-store", "data"),
+    Output("job-poll", "disabled"),
+    Output("job-poll", "n_intervals"),
+    Output("load-status", "children"),
     Input("load-button", "n_clicks"),
     State("channel-input", "value"),
     prevent_initial_call=True
 )
 def load_data(_, channel_url):
     if not channel_url:
-        return None
+        return None, True, 0, ""
 
-    df, _, _ = get_channel_videos(channel_url)
+    # Same channel already loading -> share the in-flight job
+    job = jobs.submit(channel_key(channel_url), _load_channel, channel_url)
 
-    if df.empty:
-        return None
+    return job.id, False, 0, "Loading channel…"
 
-    return df.to_dict("records")
+
+def _show(dataset, shown_version):
+    """
+    (data-store, data-version) outputs for a dataset, or no_update if
+    that version is already on screen.
+    """
+    if dataset.version == shown_version:
+        return no_update, no_update
+    return dataset.key, dataset.version
 
 
-# =========================
-# UPDATE CHARTS
-# =========================
 @app.callback(
-    Output("bar-chart", "figure"),
-    Output("scatter-chart", "figure"),
-    Input("metric-dropdown", "value"),
-    Input("data-store", "data")
+    Output("data-store", "data"),
+    Output("data-version", "data"),
+    Output("job-poll", "disabled", allow_duplicate=True),
+    Output("load-status", "children", allow_duplicate=True),
+    Input("job-poll", "n_intervals"),
+    State("job-store", "data"),
+    State("data-version", "data"),
+    prevent_initial_call=True
 )
-def update_charts(metric, data):
-    if not data:
-        return px.scatter(), px.scatter()
+def poll_load_job(_, job_id, shown_version):
+    if not job_id:
+        return no_update, no_update, True, no_update
+
+    # Local job, or the shared record of one running on another worker
+    job = jobs.get(job_id)
+
+    if job is None or job.status == FAILED:
+        return None, None, True, "Could not load this channel."
 
-    df = pd.DataFrame(data)
+    if job.status == DONE and job.result is None:
+        return None, None, True, "No videos found for this channel."
 
-    # Safe metrics
-    df["like_rate"] = (df["likes"] / df["views"]).replace([float("inf")], 0) * 100
-    df["comment_rate"] = (df["comments"] / df["views"]).replace([float("inf")], 0) * 100
-    df = df.fillna(0)
+    dataset = registry.get(job_id, shown_version)
 
-    df_bar = df.sort_values(by=metric, ascending=False).head(10).reset_index(drop=True)
-    df_bar["rank"] = df_bar.index + 1
+    if job.status == DONE:
+        if dataset is None:
+            return None, None, True, "Could not load this channel."
+        return *_show(dataset, shown_version), True, ""
 
-    bar_fig = px.bar(
-        df_bar,
+    # Still scraping: chart whatever has arrived so far
+    if dataset is None:
+        return no_update, no_update, False, no_update
+
+    return *_show(dataset, shown_version), False, f"Loading channel… {len(dataset.df)} videos so far"
+
+
+# =========================
+# UPDATE CHARTS
+# =========================
+def _build_bar(dataset, metric):
+    # Derived rates and top-K orderings are precomputed at load time
+    return px.bar(
+        dataset.top_k(metric),
         x="rank",
         y=metric,
         hover_data={"title": True},
-        title=f"Top 10 Videos by {metric.replace('_', ' ').title()}"
+        title=f"Top {TOP_K} Videos by {metric.replace('_', ' ').title()}"
     )
 
-    scatter_fig = px.scatter(
-        df,
+
+def _build_scatter(dataset):
+    return px.scatter(
+        dataset.df,
         x="views",
         y="like_rate",
         size="likes",
@@ -186,7 +301,91 @@ def update_charts(metric, data):
         title="Views vs Like Rate"
     )
 
-    return bar_fig, scatter_fig
+
+@app.callback(
+    Output("bar-chart", "figure"),
+    Input("metric-dropdown", "value"),
+    Input("data-store", "data"),
+    Input("data-version", "data")
+)
+@instrumentation.timed("app.update_bar_chart")
+def update_bar_chart(metric, key, version):
+    dataset = registry.get(key, version)
+
+    if dataset is None or dataset.df.empty:
+        return px.scatter()
+
+    return figures.get_or_build(
+        (dataset.version, "bar", metric),
+        lambda: _build_bar(dataset, metric)
+    )
+
+
+# Doesn't depend on the metric, so only rebuilt when the data changes
+@app.callback(
+    Output("scatter-chart", "figure"),
+    Input("data-store", "data"),
+    Input("data-version", "data")
+)
+@instrumentation.timed("app.update_scatter_chart")
+def update_scatter_chart(key, version):
+    dataset = registry.get(key, version)
+
+    if dataset is None or dataset.df.empty:
+        return px.scatter()
+
+    return figures.get_or_build(
+        (dataset.version, "scatter"),
+        lambda: _build_scatter(dataset)
+    )
+
+
+# =========================
+# CHANNEL COMPARISON
+# =========================
+# Also fires when the load job stops polling: a finished scrape can be
+# new in SQLite even when data-store is left unchanged (no_update)
+@app.callback(
+    Output("compare-dropdown", "options"),
+    Input("data-store", "data"),
+    Input("job-poll", "disabled")
+)
+def update_compare_options(_, _poll_disabled):
+    channels = db.list_channels()
+
+    return [
+        {
+            "label": f"{row.channel_name or row.channel_url} ({row.videos} videos)",
+            "value": row.channel_id
+        }
+        for row in channels.itertuples()
+    ]
+
+
+@app.callback(
+    Output("compare-chart", "figure"),
+    Input("compare-dropdown", "value"),
+    Input("metric-dropdown", "value")
+)
+@instrumentation.timed("app.update_compare_chart")
+def update_compare_chart(channel_ids, metric):
+    # Aggregated in SQLite, one row per channel
+    df = db.compare_channels(channel_ids or [])
+
+    if df.empty:
+        return px.scatter()
+
+    label = metric.replace("_", " ").title()
+    if metric in COUNT_COLUMNS:
+        label = f"Average {label} per Video"
+
+    return px.bar(
+        df,
+        x="channel",
+        y=metric,
+        hover_data={"videos": True},
+        title=f"{label} by Channel"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+"""
+Replays synthetic channels through the scraper and dashboard hot paths
+with a stubbed yt_dlp.YoutubeDL (no network) and reports p50/p99 latency.
+
+    python benchmark.py                                  # 10, 1k and 100k videos
+    python benchmark.py --sizes 10 1000 --repeat 20
+    python benchmark.py --latency 0.05 --json bench.json
+
+Runs in a temporary directory, so the real data/ cache is never touched.
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeYoutubeDL:
+    """
+    Stand-in for yt_dlp.YoutubeDL serving synthetic channels.
+    `latency` seconds are slept per video to mimic a network round trip.
+    """
+
+    sizes = {}       # channel url -> number of videos
+    latency = 0.0
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def extract_info(self, url, download=False, process=True):
+        if "watch?v=" in url:
+            return self._video(url.split("watch?v=")[1])
+
+        n = self.sizes[url]
+        name = url.rstrip("/").split("/")[-2]
+        entries = ({"id": f"{name}-{i}"} for i in range(n))
+        if process:
+            entries = list(entries)[:self.opts.get("playlistend") or n]
+
+        return {
+            "channel_id": "UC" + name,
+            "uploader": name,
+            "thumbnails": [],
+            "entries": entries,
+        }
+
+    def _video(self, video_id):
+        if self.latency:
+            time.sleep(self.latency)
+
+        seed = zlib.crc32(video_id.encode("utf-8"))
+        views = seed % 1_000_000
+        return {
+            "title": f"Video {video_id}",
+            "upload_date": f"2025{seed % 12 + 1:02d}{seed % 28 + 1:02d}",
+            "view_count": views,
+            "like_count": views // (seed % 50 + 10),
+            "comment_count": None if seed % 17 == 0 else views // 500,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measured path")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per video")
+    parser.add_argument("--workers", type=int, default=None, help="scraper max_workers")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # The project modules create data/ relative to the working directory
+    workdir = tempfile.mkdtemp(prefix="yt-bench-")
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    import yt_dlp
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    FakeYoutubeDL.latency = args.latency
+
+    import pandas as pd
+    import plotly.io.json as pio_json
+
+    import instrumentation
+    import youtube_scraper
+    import app
+    from metrics import METRICS
+
+    instrumentation.enable()
+    workers = args.workers or youtube_scraper.MAX_WORKERS
+    results = {}
+
+    for size in args.sizes:
+        url = f"https://www.youtube.com/@bench{size}"
+        FakeYoutubeDL.sizes[youtube_scraper._videos_url(url)] = size
+        key = youtube_scraper.channel_key(url)
+        instrumentation.reset()
+
+        # ---------- scraper ----------
+        for _ in range(args.repeat):
+            with instrumentation.timer("bench.scrape_miss"):
+                df, _, _ = youtube_scraper.get_channel_videos(
+                    url, max_results=size, refresh=True, max_workers=workers
+                )
+
+        for _ in range(args.repeat):
+            with instrumentation.timer("bench.scrape_hit"):
+                youtube_scraper.get_channel_videos(url, max_results=size)
+
+        # Legacy CSV cache, for comparison with the Parquet cache
+        csv_path = os.path.join(workdir, f"{key}.csv")
+        for _ in range(args.repeat):
+            with instrumentation.timer("bench.csv_write"):
+                df.to_csv(csv_path, index=False)
+            with instrumentation.timer("bench.csv_read"):
+                pd.read_csv(csv_path)
+
+        # ---------- app ----------
+        # Cache hit + Dataset build (derived columns, top-K, version hash)
+        for _ in range(args.repeat):
+            app._load_channel(url)
+
+        for _ in range(args.repeat):
+            app.figures.clear()
+            for metric in METRICS:
+                with instrumentation.timer("bench.bar_cold"):
+                    fig = app.update_bar_chart(metric, key, None)
+            with instrumentation.timer("bench.scatter_cold"):
+                scatter = app.update_scatter_chart(key, None)
+
+            for metric in METRICS:
+                with instrumentation.timer("bench.bar_warm"):
+                    app.update_bar_chart(metric, key, None)
+
+            # What Dash does with the callback result before responding
+            with instrumentation.timer("bench.serialize_bar"):
+                pio_json.to_json_plotly(fig)
+            with instrumentation.timer("bench.serialize_scatter"):
+                pio_json.to_json_plotly(scatter)
+
+        results[size] = instrumentation.snapshot()
+        _report(size, results[size])
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+def _report(size, snap):
+    print(f"\n=== {size:,} videos ===")
+    print(f"{'path':<30}{'count':>7}{'p50 ms':>12}{'p99 ms':>12}{'max ms':>12}")
+
+    for name, t in sorted(snap["timings"].items()):
+        print(f"{name:<30}{t['count']:>7}{t['p50_ms']:>12.3f}{t['p99_ms']:>12.3f}{t['max_ms']:>12.3f}")
+
+    if snap["counters"]:
+        print("counters:", ", ".join(f"{k}={v}" for k, v in sorted(snap["counters"].items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows: locking is per process only
+    fcntl = None
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from metrics import RATE_COLUMNS, add_derived
+import instrumentation
+
+CACHE_DIR = os.path.join("data", "cache")
+CACHE_TTL = 6 * 60 * 60               # seconds before an entry must be refetched
+CACHE_MAX_BYTES = 200 * 1024 * 1024   # total size of cached files on disk
+ACCESS_RESOLUTION = 5                 # seconds; a hit only rewrites the index once per this
+
+# Column -> pandas dtype. Every cached frame is coerced to this so a hit
+# always comes back with the same types (no CSV type inference).
+SCHEMA = {
+    "video_id": "string",
+    "title": "string",
+    "upload_date": "datetime64[ns]",
+    "views": "Int64",
+    "likes": "Int64",
+    "comments": "Int64",
+    "like_rate": "float64",      # derived, see metrics.add_derived
+    "comment_rate": "float64",
+}
+
+_INDEX_FILE = "index.json"
+
+
+def cache_key(channel_url: str) -> str:
+    return hashlib.md5(channel_url.encode("utf-8")).hexdigest()
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce a frame to SCHEMA. Missing columns are added as nulls (derived
+    rate columns are computed), unknown columns are kept after the schema
+    columns.
+    """
+    df = df.copy()
+
+    for col, dtype in SCHEMA.items():
+        if col in RATE_COLUMNS:
+            continue
+        if col not in df.columns:
+            df[col] = pd.Series([None] * len(df), dtype=dtype)
+        elif dtype == "string":
+            df[col] = df[col].astype("string")
+        elif dtype.startswith("datetime"):
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                # yt-dlp reports upload dates as YYYYMMDD
+                df[col] = pd.to_datetime(df[col], format="%Y%m%d", errors="coerce")
+            df[col] = df[col].astype(dtype)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+
+    if all(col in df.columns for col in RATE_COLUMNS):
+        for col in RATE_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0).astype("float64")
+    else:
+        add_derived(df)
+
+    extra = [c for c in df.columns if c not in SCHEMA]
+    return df[list(SCHEMA) + extra].reset_index(drop=True)
+
+
+def _atomic_write(path, write):
+    """
+    Write through a temp file in the same directory, then rename over
+    `path`, so readers never see a half-written file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on `path` shared by every process on this machine
+    (gunicorn workers), held until the block exits.
+    """
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_claimed = set()   # run dirs held by this process (covers platforms without fcntl)
+
+
+def _try_claim(path):
+    """
+    Non-blocking exclusive lock on `path`. Returns the open lock file, or
+    None if another scrape (in any process) holds it.
+    """
+    if path in _claimed:
+        return None
+
+    f = open(path, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+
+    _claimed.add(path)
+    return f
+
+
+class Checkpoint:
+    """
+    Part files of one scrape run, kept in their own <key>.run-<id>/
+    directory. The run holds the directory's owner.lock while it is
+    alive, so concurrent scrapes of the same channel never share or
+    delete each other's parts; a later scrape only adopts a run whose
+    owner is gone.
+    """
+
+    def __init__(self, path, lock):
+        self.path = path
+        self._lock = lock
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def add(self, df):
+        df = normalize(df)
+        path = os.path.join(self.path, f"part-{len(self.parts()):05d}.parquet")
+        _atomic_write(path, lambda tmp: df.to_parquet(tmp, index=False))
+        return df
+
+    def __iter__(self):
+        for path in self.parts():
+            yield normalize(pd.read_parquet(path))
+
+    def release(self):
+        """
+        Give up ownership; the parts stay on disk for a later resume.
+        """
+        if self._lock is not None:
+            _claimed.discard(self._lock.name)
+            self._lock.close()   # closing drops the flock
+            self._lock = None
+
+    def discard(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.release()
+
+
+class CacheStore:
+    """
+    Parquet cache of channel frames with a per-entry TTL and a
+    size-bounded LRU eviction policy. Expired entries are not served by
+    default but stay on disk (evicted first) so an incremental refresh
+    can diff against them.
+
+    index.json maps key -> {file, created, accessed, size, meta}. Every
+    read-modify-write of it holds index.lock, so concurrent worker
+    processes cannot lose each other's updates.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # ---------- index ----------
+    @contextmanager
+    def _locked(self):
+        with self._lock, file_lock(os.path.join(self.cache_dir, "index.lock")):
+            yield
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, _INDEX_FILE)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+
+        _atomic_write(self._index_path(), write)
+
+    def _drop(self, index, key):
+        entry = index.pop(key, None)
+        if entry:
+            path = os.path.join(self.cache_dir, entry["file"])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _touch(self, key, now):
+        with self._locked():
+            index = self._load_index()
+            if key in index:
+                index[key]["accessed"] = now
+                self._save_index(index)
+
+    def _forget(self, key, entry):
+        # Unreadable file: drop the entry, unless it was rewritten meanwhile
+        with self._locked():
+            index = self._load_index()
+            current = index.get(key)
+            if current is not None and current["created"] == entry["created"]:
+                self._drop(index, key)
+                self._save_index(index)
+
+    # ---------- public API ----------
+    def get(self, key, allow_stale=False):
+        """
+        Returns (df, meta) for a fresh entry, or None if the entry is
+        missing, unreadable or expired (unless allow_stale).
+
+        Only the index lookup holds the lock; the Parquet file is read
+        outside it (writes replace it atomically).
+        """
+        with self._locked():
+            entry = self._load_index().get(key)
+
+        if entry is None:
+            instrumentation.incr("cache.miss")
+            return None
+
+        now = time.time()
+        if now - entry["created"] > self.ttl and not allow_stale:
+            instrumentation.incr("cache.expired")
+            return None
+
+        try:
+            with instrumentation.timer("cache.read"):
+                df = pd.read_parquet(os.path.join(self.cache_dir, entry["file"]))
+        except Exception:
+            self._forget(key, entry)
+            return None
+
+        if now - entry["accessed"] > ACCESS_RESOLUTION:
+            self._touch(key, now)
+        instrumentation.incr("cache.hit")
+
+        return normalize(df), entry.get("meta") or {}
+
+    def created(self, key):
+        """
+        When the entry for `key` was written (time.time()), or None.
+        Only reads the index, not the frame.
+        """
+        with self._locked():
+            entry = self._load_index().get(key)
+        return entry["created"] if entry else None
+
+    def expired(self, key):
+        """
+        True if `key` has an entry past its TTL (kept on disk so an
+        incremental refresh can diff against it).
+        """
+        created = self.created(key)
+        return created is not None and time.time() - created > self.ttl
+
+    def put(self, key, df, meta=None):
+        """
+        Store a frame (coerced to SCHEMA) and evict least recently used
+        entries until the cache fits in max_bytes.
+        """
+        df = normalize(df)
+        self._write(key, lambda tmp: df.to_parquet(tmp, index=False), meta)
+        return df
+
+    def put_checkpoint(self, key, checkpoint, meta=None):
+        """
+        Store a finished run's parts as the entry for `key`, streaming
+        them into one Parquet file a part at a time.
+        """
+        parts = checkpoint.parts()
+        if not parts:
+            self.put(key, pd.DataFrame(), meta)
+            return
+
+        def write(tmp):
+            schema = pq.read_schema(parts[0])
+            with pq.ParquetWriter(tmp, schema) as writer:
+                for path in parts:
+                    writer.write_table(pq.read_table(path).cast(schema))
+
+        self._write(key, write, meta)
+
+    def _write(self, key, write, meta):
+        filename = key + ".parquet"
+        path = os.path.join(self.cache_dir, filename)
+
+        with self._locked(), instrumentation.timer("cache.write"):
+            _atomic_write(path, write)
+
+            now = time.time()
+            index = self._load_index()
+            index[key] = {
+                "file": filename,
+                "created": now,
+                "accessed": now,
+                "size": os.path.getsize(path),
+                "meta": meta or {},
+            }
+            self._evict(index, keep=key)
+            self._save_index(index)
+
+    # ---------- checkpoints ----------
+    def open_checkpoint(self, key, resume=True):
+        """
+        Claim a Checkpoint for a new scrape of `key`. With resume, an
+        abandoned run (owner gone) is adopted so its parts can be
+        replayed; other abandoned runs are deleted. Runs that are still
+        alive are left alone.
+        """
+        with self._locked():
+            adopted = None
+
+            for path in sorted(glob.glob(os.path.join(self.cache_dir, key + ".run-*"))):
+                lock = _try_claim(os.path.join(path, "owner.lock"))
+                if lock is None:
+                    continue   # another scrape is running in it
+
+                checkpoint = Checkpoint(path, lock)
+                if resume and adopted is None:
+                    adopted = checkpoint
+                else:
+                    checkpoint.discard()
+
+            if adopted is not None:
+                return adopted
+
+            path = tempfile.mkdtemp(prefix=key + ".run-", dir=self.cache_dir)
+            return Checkpoint(path, _try_claim(os.path.join(path, "owner.lock")))
+
+    def _evict(self, index, keep=None):
+        now = time.time()
+
+        def order(key):
+            # Expired entries go first, then least recently used
+            entry = index[key]
+            return now - entry["created"] <= self.ttl, entry["accessed"]
+
+        total = sum(e["size"] for e in index.values())
+        for key in sorted(index, key=order):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index[key]["size"]
+            self._drop(index, key)
+
+
+store = CacheStore()
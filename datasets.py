@@ -0,0 +1,115 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from cache_store import store
+from metrics import COUNT_COLUMNS, TOP_K, top_k_index
+
+REGISTRY_MAX_BYTES = 256 * 1024 * 1024   # in-process memory for loaded frames
+
+
+class Dataset:
+    """
+    A loaded channel: the chart-ready frame plus per-metric top-K
+    orderings, both built once when the channel is loaded.
+
+    `version` is a content hash, so every worker that loads the same
+    data agrees on it (used to key cached figures). `created` is when
+    the data was produced: the cache entry's write time, or now for
+    frames published while scraping.
+    """
+
+    def __init__(self, key, df, created=None):
+        self.key = key
+        self.created = created if created is not None else time.time()
+        self.df = df.fillna({col: 0 for col in COUNT_COLUMNS})
+        self.version = hashlib.md5(
+            pd.util.hash_pandas_object(self.df, index=False).to_numpy().tobytes()
+        ).hexdigest()
+        self.top = top_k_index(self.df)
+        self.nbytes = int(self.df.memory_usage(deep=True).sum())
+
+    def top_k(self, metric, k=TOP_K):
+        """
+        The top `k` rows for `metric`, highest first, with a 1-based rank.
+        """
+        rows = self.df.iloc[self.top[metric][:k]].reset_index(drop=True)
+        rows["rank"] = rows.index + 1
+        return rows
+
+
+class DatasetRegistry:
+    """
+    In-process LRU of loaded Datasets, keyed by channel key.
+
+    The browser only holds the key (in dcc.Store); callbacks look the
+    frame up here instead of round-tripping records as JSON. A key that
+    was evicted, or loaded by another gunicorn worker, is reloaded from
+    the on-disk cache, even past its TTL (the user already loaded it).
+    So is a frame older than the cache entry, when it isn't the version
+    the caller already shows (another worker refreshed the channel).
+    """
+
+    def __init__(self, max_bytes=REGISTRY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()   # key -> Dataset
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def put(self, key, df, created=None):
+        dataset = Dataset(key, df, created)
+
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._total -= old.nbytes
+
+            self._frames[key] = dataset
+            self._total += dataset.nbytes
+
+            # Evict least recently used, but always keep the newest frame
+            while self._total > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self._total -= evicted.nbytes
+
+        return dataset
+
+    def get(self, key, version=None):
+        """
+        Returns the Dataset for `key`, or None if it is neither in memory
+        nor in the cache. `version` is the one the caller shows; any other
+        in-memory version is checked against the cache entry's age.
+        """
+        if not key:
+            return None
+
+        with self._lock:
+            hit = self._frames.get(key)
+            if hit is not None:
+                self._frames.move_to_end(key)
+
+        if hit is not None:
+            if hit.version == version:
+                return hit
+            created = store.created(key)
+            if created is None or created <= hit.created:
+                return hit
+
+        return self.load(key) or hit
+
+    def load(self, key):
+        """
+        (Re)load `key` from the on-disk cache, or None if it isn't cached.
+        """
+        created = store.created(key)
+        cached = store.get(key, allow_stale=True)
+        if cached is None:
+            return None
+
+        return self.put(key, cached[0], created)
+
+
+registry = DatasetRegistry()
@@ -0,0 +1,53 @@
+import threading
+from collections import OrderedDict
+
+import instrumentation
+
+FIGURE_CACHE_SIZE = 256   # serialized figures kept per process
+
+
+class FigureCache:
+    """
+    Bounded LRU of serialized Plotly figures, keyed by
+    (dataset version, chart, metric).
+    """
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """
+        Return the cached figure dict for `key`, or call `build()`,
+        serialize its figure and cache the result.
+        """
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                instrumentation.incr("figures.hit")
+                return fig
+
+        instrumentation.incr("figures.miss")
+
+        # Build outside the lock; a concurrent miss just builds twice
+        with instrumentation.timer("figures.build"):
+            figure = build()
+        with instrumentation.timer("figures.serialize"):
+            fig = figure.to_plotly_json()
+
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+figures = FigureCache()
@@ -0,0 +1,105 @@
+import os
+import json
+import math
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Off by default: set YT_METRICS=1 to record timings and counters,
+# YT_METRICS_LOG=1 to also print one JSON line per timing.
+ENABLED = os.environ.get("YT_METRICS") == "1"
+LOG = os.environ.get("YT_METRICS_LOG") == "1"
+
+SAMPLES = 1000   # most recent timings kept per name
+
+_lock = threading.Lock()
+_timings = defaultdict(lambda: deque(maxlen=SAMPLES))
+_counters = defaultdict(int)
+
+
+def enable(log=False):
+    global ENABLED, LOG
+    ENABLED = True
+    LOG = log
+
+
+def record(name, seconds):
+    if not ENABLED:
+        return
+
+    with _lock:
+        _timings[name].append(seconds)
+
+    if LOG:
+        print(json.dumps({"metric": name, "ms": round(seconds * 1000, 3)}))
+
+
+def incr(name, n=1):
+    if not ENABLED:
+        return
+
+    with _lock:
+        _counters[name] += n
+
+
+@contextmanager
+def timer(name):
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Decorator form of timer(); a no-op wrapper when metrics are off.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _percentile(values, q):
+    # Nearest-rank percentile of an already sorted list
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def snapshot():
+    """
+    {"timings": {name: {count, mean_ms, p50_ms, p99_ms, max_ms}},
+     "counters": {name: value}} over the retained samples.
+    """
+    with _lock:
+        timings = {name: sorted(samples) for name, samples in _timings.items()}
+        counters = dict(_counters)
+
+    summary = {}
+    for name, values in timings.items():
+        if not values:
+            continue
+        summary[name] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3),
+            "p50_ms": round(_percentile(values, 50) * 1000, 3),
+            "p99_ms": round(_percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+
+    return {"timings": summary, "counters": counters}
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
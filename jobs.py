@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import uuid
+import socket
+import weakref
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_store import file_lock
+
+JOB_WORKERS = 4      # channels scraped at once per process
+JOB_KEEP = 10 * 60   # seconds a finished job stays pollable
+JOB_TIMEOUT = 60 * 60   # a job another worker hasn't finished by now is treated as failed
+JOB_HEARTBEAT = 10      # seconds between status rewrites of a running job
+JOB_STALE = 60          # an active record not rewritten for this long has lost its worker
+JOBS_DIR = os.path.join("data", "jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_managers = weakref.WeakValueDictionary()   # token -> live JobManager in this process
+
+
+def _owner_alive(owner):
+    """
+    False if the worker that owns a record is known to be gone: its
+    JobManager (same process) or its process (same host) no longer
+    exists. Other hosts are judged by heartbeat alone.
+    """
+    if not owner:
+        return False   # written before owners were recorded
+    if owner.get("host") != socket.gethostname():
+        return True
+
+    pid = owner.get("pid")
+    if pid == os.getpid():
+        return owner.get("token") in _managers
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, TypeError):
+        pass   # exists but not ours to signal
+    return True
+
+
+class Job:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.updated = self.submitted
+        self.finished = None
+        self.owner = None   # {"host", "pid", "token"} of the worker running it
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self):
+        return {
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "submitted": self.submitted,
+            "updated": self.updated,
+            "finished": self.finished,
+            "owner": self.owner,
+        }
+
+    @classmethod
+    def from_dict(cls, job_id, data):
+        job = cls(job_id)
+        for name, value in data.items():
+            setattr(job, name, value)
+        return job
+
+
+class JobManager:
+    """
+    Runs slow work (channel scrapes) on a local thread pool so Dash
+    callbacks return immediately and poll for the result.
+
+    Jobs are de-duplicated by id: submitting an id that is still queued
+    or running returns the in-flight job instead of starting another.
+    Every status change is also written to JOBS_DIR/<id>.json, so a
+    poll (or submit) landing on another gunicorn worker sees the job
+    too. Results must be JSON-serializable.
+
+    Records name their owner and are rewritten every JOB_HEARTBEAT
+    seconds while active; one whose owner is gone or has gone quiet
+    for JOB_STALE seconds reads as FAILED, so a restarted worker
+    doesn't leave polls (or new submits) waiting on it.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, jobs_dir=JOBS_DIR):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()   # a heartbeat must not overwrite a final status
+        self._heartbeat = None
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        token = uuid.uuid4().hex
+        self.owner = {"host": socket.gethostname(), "pid": os.getpid(), "token": token}
+        _managers[token] = self
+
+    def submit(self, job_id, fn, *args, **kwargs):
+        # The file lock makes check-then-create atomic across workers too
+        with self._lock, file_lock(os.path.join(self.jobs_dir, job_id + ".lock")):
+            self._prune()
+
+            job = self._jobs.get(job_id) or self._load(job_id)
+            if job is not None and job.active:
+                return job
+
+            job = Job(job_id)
+            job.owner = self.owner
+            self._jobs[job_id] = job
+            self._publish(job)
+            self._start_heartbeat()
+
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """
+        The job from this process, else its shared record, else None.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    # ---------- shared records ----------
+    def _path(self, job_id):
+        return os.path.join(self.jobs_dir, job_id + ".json")
+
+    def _publish(self, job):
+        with self._publish_lock:
+            job.updated = time.time()
+            fd, tmp = tempfile.mkstemp(dir=self.jobs_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f)
+            os.replace(tmp, self._path(job.id))
+
+    def _load(self, job_id):
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                job = Job.from_dict(job_id, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+        if not job.active:
+            return job
+
+        # The worker running it died, restarted or hung: don't poll forever
+        now = time.time()
+        if not _owner_alive(job.owner) or now - job.updated > JOB_STALE:
+            job.status = FAILED
+            job.error = "worker gone"
+        elif now - job.submitted > JOB_TIMEOUT:
+            job.status = FAILED
+            job.error = "timed out"
+        return job
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            # Holds only a weak reference, so it ends with the manager
+            self._heartbeat = threading.Thread(
+                target=_heartbeat, args=(weakref.ref(self),), name="job-heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def _beat(self):
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.active]
+        for job in active:
+            self._publish(job)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_KEEP
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished is not None and j.finished < cutoff]:
+            del self._jobs[job_id]
+            try:
+                os.remove(self._path(job_id))
+            except OSError:
+                pass
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        self._publish(job)
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            print("JOB ERROR:", job.id, e)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            self._publish(job)
+
+
+def _heartbeat(ref):
+    while True:
+        time.sleep(JOB_HEARTBEAT)
+        manager = ref()
+        if manager is None:
+            return
+        manager._beat()
+        del manager
+
+
+jobs = JobManager()
@@ -0,0 +1,51 @@
+import numpy as np
+
+TOP_K = 10
+
+COUNT_COLUMNS = ["views", "likes", "comments"]
+RATE_COLUMNS = {
+    # derived column -> numerator (denominator is always views)
+    "like_rate": "likes",
+    "comment_rate": "comments",
+}
+METRICS = COUNT_COLUMNS + list(RATE_COLUMNS)
+
+
+def _as_float(series):
+    return series.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def add_derived(df):
+    """
+    Add like_rate / comment_rate (%) in place, vectorized.
+    Videos with zero or missing views get a rate of 0.
+    """
+    views = _as_float(df["views"])
+    has_views = views > 0
+
+    for col, numerator in RATE_COLUMNS.items():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(has_views, _as_float(df[numerator]) / views * 100, 0.0)
+        df[col] = np.nan_to_num(rate, nan=0.0, posinf=0.0, neginf=0.0)
+
+    return df
+
+
+def top_k_index(df, metrics=METRICS, k=TOP_K):
+    """
+    metric -> row positions of the top `k` rows, highest first.
+    Missing values rank as 0.
+    """
+    index = {}
+
+    for metric in metrics:
+        values = np.nan_to_num(_as_float(df[metric]), nan=0.0)
+
+        if len(values) > k:
+            part = np.argpartition(-values, k - 1)[:k]
+        else:
+            part = np.arange(len(values))
+
+        index[metric] = part[np.argsort(-values[part], kind="stable")]
+
+    return index
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame(n, views=100):
+    return pd.DataFrame({
+        "video_id": [f"v{i}" for i in range(n)],
+        "title": [f"Video {i}" for i in range(n)],
+        "upload_date": ["20260101"] * n,
+        "views": [views] * n,
+        "likes": [10] * n,
+        "comments": [None] * n,
+    })
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import cache_store
+
+    monkeypatch.setattr(cache_store, "ACCESS_RESOLUTION", 0)
+    return cache_store, cache_store.CacheStore(str(tmp_path / "cache"))
+
+
+def test_round_trip_keeps_schema(cache):
+    cache_store, store = cache
+    store.put("a", _frame(3), meta={"channel_name": "A"})
+
+    df, meta = store.get("a")
+    assert meta == {"channel_name": "A"}
+    assert list(df.columns) == list(cache_store.SCHEMA)
+    assert str(df["comments"].dtype) == "Int64"
+    assert df["upload_date"].iloc[0] == pd.Timestamp("2026-01-01")
+
+
+def test_expired_entry_is_only_served_stale(cache):
+    _, store = cache
+    store.put("a", _frame(3))
+    store.ttl = 0
+    time.sleep(0.01)
+
+    assert store.get("a") is None
+    assert store.expired("a")
+    assert len(store.get("a", allow_stale=True)[0]) == 3
+
+
+def test_get_refreshes_lru_order(cache):
+    _, store = cache
+    for key in "abc":
+        store.put(key, _frame(50))
+        time.sleep(0.01)
+
+    size = os.path.getsize(os.path.join(store.cache_dir, "a.parquet"))
+    store.max_bytes = int(size * 3.5)
+
+    store.get("a")   # now b is the least recently used
+    store.put("d", _frame(50))
+
+    assert store.get("b") is None
+    assert all(store.get(key) is not None for key in "acd")
+
+
+def test_put_never_evicts_the_new_entry(cache):
+    _, store = cache
+    store.put("a", _frame(10))
+    store.max_bytes = 1
+
+    store.put("b", _frame(10))
+
+    assert store.get("a") is None
+    assert len(store.get("b")[0]) == 10
+
+
+def test_unreadable_file_is_dropped(cache):
+    _, store = cache
+    store.put("a", _frame(3))
+    with open(os.path.join(store.cache_dir, "a.parquet"), "w") as f:
+        f.write("not parquet")
+
+    assert store.get("a") is None
+    assert store.created("a") is None
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame(n):
+    from cache_store import normalize
+
+    return normalize(pd.DataFrame({
+        "video_id": [f"v{i}" for i in range(n)],
+        "title": [f"Video {i}" for i in range(n)],
+        "upload_date": ["20260101"] * n,
+        "views": [100] * n,
+        "likes": [10] * n,
+        "comments": [1] * n,
+    }))
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    # Two gunicorn workers: separate registries over one on-disk cache
+    monkeypatch.chdir(tmp_path)
+    import datasets
+    from cache_store import CacheStore
+
+    monkeypatch.setattr(datasets, "store", CacheStore(str(tmp_path / "cache")))
+    return datasets.store, datasets.DatasetRegistry(), datasets.DatasetRegistry()
+
+
+def test_worker_reloads_a_channel_refreshed_elsewhere(workers):
+    store, a, b = workers
+    store.put("k", _frame(1))
+    old = b.get("k")
+    assert len(old.df) == 1
+
+    # Worker A scrapes the channel again and publishes it
+    store.put("k", _frame(2))
+    shown = a.load("k")
+
+    assert len(b.get("k", old.version).df) == 1   # still the version on screen
+    assert len(b.get("k", shown.version).df) == 2
+    assert b.get("k").version == shown.version
+
+
+def test_partial_frame_is_kept_over_an_older_entry(workers):
+    store, a, _ = workers
+    store.put("k", _frame(1))
+
+    # Published mid-scrape, newer than the cache entry
+    partial = a.put("k", _frame(3))
+    assert a.get("k") is partial
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def jobs_module(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import jobs
+    return jobs
+
+
+def _wait(manager, job_id):
+    for _ in range(100):
+        job = manager.get(job_id)
+        if not job.active:
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job never finished")
+
+
+def test_restarted_worker_reruns_orphaned_job(jobs_module, tmp_path):
+    jobs_dir = str(tmp_path / "jobs")
+
+    # A worker process that dies with its job still running
+    subprocess.run([
+        sys.executable, "-c",
+        "import os, time, jobs; "
+        f"jobs.JobManager(jobs_dir={jobs_dir!r}).submit('k', time.sleep, 60); "
+        "time.sleep(0.2); os._exit(0)",
+    ], cwd=ROOT, check=True)
+
+    new = jobs_module.JobManager(jobs_dir=jobs_dir)
+    assert new.get("k").status == jobs_module.FAILED
+
+    new.submit("k", lambda: "fresh")
+    assert _wait(new, "k").result == "fresh"
+
+
+def test_running_job_is_shared_across_workers(jobs_module, tmp_path):
+    jobs_dir = str(tmp_path / "jobs")
+    release = threading.Event()
+
+    a = jobs_module.JobManager(jobs_dir=jobs_dir)
+    b = jobs_module.JobManager(jobs_dir=jobs_dir)
+    a.submit("k", release.wait)
+
+    # B sees A's job in flight instead of starting its own
+    assert b.submit("k", lambda: "duplicate").active
+    assert "k" not in b._jobs
+
+    release.set()
+    assert _wait(b, "k").status == jobs_module.DONE
+
+
+def test_silent_record_reads_as_failed(jobs_module, tmp_path, monkeypatch):
+    jobs_dir = str(tmp_path / "jobs")
+    release = threading.Event()
+
+    a = jobs_module.JobManager(jobs_dir=jobs_dir)
+    a.submit("k", release.wait)
+    assert a._load("k").active
+
+    monkeypatch.setattr(jobs_module, "JOB_STALE", 0)
+    time.sleep(0.01)
+    assert a._load("k").status == jobs_module.FAILED
+    release.set()
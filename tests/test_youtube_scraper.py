@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeYoutubeDL:
+    """
+    Local stand-in for yt_dlp.YoutubeDL: per-video delays and failures
+    come from class attributes, no network access.
+    """
+
+    delays = {}       # video id -> seconds
+    private = set()   # video ids that raise like unavailable videos
+    channel_size = 0  # uploads listed for any channel url
+    views = {}        # video id -> view count (default 100)
+    created = 0       # instances built so far
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+        FakeYoutubeDL.created += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False, process=True):
+        if "watch?v=" not in url:
+            entries = ({"id": f"v{i}"} for i in range(self.channel_size))
+            if process:
+                entries = list(entries)[:self.opts.get("playlistend") or self.channel_size]
+            return {"channel_id": "UCfake", "uploader": "Fake", "entries": entries}
+
+        video_id = url.split("watch?v=")[1]
+        time.sleep(self.delays.get(video_id, 0.05))
+
+        if video_id in self.private:
+            raise Exception("Private video")
+
+        return {
+            "title": f"Video {video_id}",
+            "upload_date": "20260101",
+            "view_count": self.views.get(video_id, 100),
+            "like_count": 10,
+            "comment_count": 1,
+        }
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    # The module creates data/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    import youtube_scraper
+    from cache_store import CacheStore
+    from video_store import VideoStore
+
+    monkeypatch.setattr(youtube_scraper.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    monkeypatch.setattr(youtube_scraper, "store", CacheStore(str(tmp_path / "cache")))
+    monkeypatch.setattr(youtube_scraper, "db", VideoStore(str(tmp_path / "videos.db")))
+    youtube_scraper._local.__dict__.clear()
+    FakeYoutubeDL.delays = {}
+    FakeYoutubeDL.private = set()
+    FakeYoutubeDL.channel_size = 0
+    FakeYoutubeDL.views = {}
+    return youtube_scraper
+
+
+def test_fetch_keeps_order_and_skips_private(scraper):
+    ids = [f"v{i}" for i in range(12)]
+    FakeYoutubeDL.private = {"v3", "v7"}
+    FakeYoutubeDL.delays = {"v0": 0.2, "v1": 0.1}   # finish out of order
+
+    timings = []
+    rows = scraper._fetch_videos(ids, max_workers=4, video_timeout=5, timings=timings)
+
+    assert [r["video_id"] for r in rows] == [v for v in ids if v not in {"v3", "v7"}]
+    assert [t[0] for t in timings] == ids
+    assert {t[0]: t[2] for t in timings}["v3"] == "error"
+    assert all(t[1] > 0 for t in timings)
+    assert sum(t[2] == "ok" for t in timings) == 10
+
+
+def test_concurrent_fetch_is_faster(scraper):
+    ids = [f"v{i}" for i in range(16)]
+
+    start = time.perf_counter()
+    sequential = scraper._fetch_videos(ids, max_workers=1)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = scraper._fetch_videos(ids, max_workers=8)
+    concurrent_time = time.perf_counter() - start
+
+    assert concurrent == sequential
+    assert concurrent_time < sequential_time / 3
+
+
+def test_workers_reuse_their_extractor(scraper):
+    ids = [f"v{i}" for i in range(16)]
+    scraper._fetch_videos(ids, max_workers=4)
+
+    before = FakeYoutubeDL.created
+    scraper._fetch_videos(ids, max_workers=4)
+    assert FakeYoutubeDL.created == before
+
+
+def test_timeout_is_per_video_not_per_wave(scraper):
+    ids = list("abcdefgh")
+    FakeYoutubeDL.delays = {v: 0.7 for v in ids}
+    FakeYoutubeDL.delays["a"] = 5   # hangs and holds one worker
+
+    timings = []
+    rows = scraper._fetch_videos(ids, max_workers=2, video_timeout=1, timings=timings)
+
+    status = {t[0]: t[2] for t in timings}
+    assert status["a"] == "timeout"
+    assert [r["video_id"] for r in rows] == list("bcdefgh")
+
+
+def test_concurrent_scrapes_of_one_channel_keep_all_rows(scraper):
+    FakeYoutubeDL.channel_size = 200
+    FakeYoutubeDL.delays = {f"v{i}": 0 for i in range(200)}
+    url = "https://www.youtube.com/@fake"
+
+    first = scraper.iter_channel_videos(url, refresh=True)
+    second = scraper.iter_channel_videos(url, refresh=True)
+
+    # Interleave the two scrapes batch by batch
+    for a, b in zip(first, second):
+        pass
+    for _ in first:
+        pass
+    for _ in second:
+        pass
+
+    df, _ = scraper.store.get(scraper.channel_key(url))
+    assert len(df) == 200
+    assert list(df["video_id"]) == [f"v{i}" for i in range(200)]
+
+
+def test_interrupted_scrape_resumes(scraper):
+    FakeYoutubeDL.channel_size = 120
+    FakeYoutubeDL.delays = {f"v{i}": 0 for i in range(120)}
+    url = "https://www.youtube.com/@fake"
+
+    scrape = scraper.iter_channel_videos(url, batch_size=50)
+    next(scrape)
+    scrape.close()   # stop after the first batch
+
+    fetched = []
+    original = scraper._fetch_videos
+    scraper._fetch_videos = lambda ids, **kw: fetched.extend(ids) or original(ids, **kw)
+    try:
+        batches = [b for b, _, _ in scraper.iter_channel_videos(url, batch_size=50)]
+    finally:
+        scraper._fetch_videos = original
+
+    assert sum(len(b) for b in batches) == 120
+    assert fetched == [f"v{i}" for i in range(50, 120)]
+
+
+def test_expired_entry_is_refetched(scraper):
+    FakeYoutubeDL.channel_size = 10
+    FakeYoutubeDL.delays = {f"v{i}": 0 for i in range(10)}
+    url = "https://www.youtube.com/@fake"
+
+    df, _, _ = scraper.get_channel_videos(url, max_results=10)
+    assert set(df["views"]) == {100}
+
+    FakeYoutubeDL.views = {f"v{i}": 500 for i in range(10)}
+    assert set(scraper.get_channel_videos(url, max_results=10)[0]["views"]) == {100}   # fresh hit
+
+    scraper.store.ttl = 0
+    df, _, _ = scraper.get_channel_videos(url, max_results=10)
+    assert list(df["video_id"]) == [f"v{i}" for i in range(10)]
+    assert set(df["views"]) == {500}
+
+
+def test_incremental_refresh_streams_in_batches(scraper):
+    FakeYoutubeDL.channel_size = 10
+    FakeYoutubeDL.delays = {f"v{i}": 0 for i in range(30)}
+    url = "https://www.youtube.com/@fake"
+    scraper.get_channel_videos(url, max_results=10)
+
+    scraper.store.ttl = 0
+    FakeYoutubeDL.channel_size = 30
+    batches = [b for b, _, _ in scraper.iter_channel_videos(
+        url, max_results=1000, batch_size=5, refresh="incremental"
+    )]
+
+    # Cached rows first, then the unseen videos a batch at a time
+    assert [len(b) for b in batches] == [10, 5, 5, 5, 5]
+    assert list(batches[0]["video_id"]) == [f"v{i}" for i in range(10)]
+    assert scraper.db.list_channels()["videos"].tolist() == [30]
+
+
+def _seed_cache(scraper, url):
+    # v2 is a recent upload, v9 has dropped out of the listing
+    recent = (pd.Timestamp.now() - pd.Timedelta(days=1)).strftime("%Y%m%d")
+    ids = ["v1", "v2", "v3", "v9"]
+    scraper.store.put(scraper.channel_key(url), pd.DataFrame({
+        "video_id": ids,
+        "title": [f"Cached {v}" for v in ids],
+        "upload_date": ["20250101", recent, "20250101", "20250101"],
+        "views": [1] * len(ids),
+        "likes": [0] * len(ids),
+        "comments": [0] * len(ids),
+    }))
+
+
+def test_incremental_fetches_unseen_and_recent_only(scraper):
+    url = "https://www.youtube.com/@fake"
+    _seed_cache(scraper, url)
+    FakeYoutubeDL.channel_size = 5
+    FakeYoutubeDL.delays = {f"v{i}": 0 for i in range(5)}
+
+    timings = []
+    df, _, _ = scraper.get_channel_videos(url, max_results=5, refresh="incremental", timings=timings)
+
+    assert [t[0] for t in timings] == ["v0", "v2", "v4"]
+    # Listing order, then cached videos no longer listed
+    assert list(df["video_id"]) == ["v0", "v1", "v2", "v3", "v4", "v9"]
+    assert dict(zip(df["video_id"], df["views"])) == {
+        "v0": 100, "v1": 1, "v2": 100, "v3": 1, "v4": 100, "v9": 1,
+    }
+
+
+def test_incremental_keeps_cached_row_when_refetch_fails(scraper):
+    url = "https://www.youtube.com/@fake"
+    _seed_cache(scraper, url)
+    FakeYoutubeDL.channel_size = 5
+    FakeYoutubeDL.delays = {f"v{i}": 0 for i in range(5)}
+    FakeYoutubeDL.private = {"v2"}
+
+    df, _, _ = scraper.get_channel_videos(url, max_results=5, refresh="incremental")
+
+    row = df.set_index("video_id").loc["v2"]
+    assert row["title"] == "Cached v2"
+    assert row["views"] == 1
+    assert len(df) == 6
@@ -0,0 +1,174 @@
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+DB_PATH = os.path.join("data", "videos.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id   TEXT PRIMARY KEY,
+    channel_key  TEXT NOT NULL,
+    channel_url  TEXT,
+    channel_name TEXT,
+    channel_logo TEXT,
+    updated_at   REAL
+);
+
+-- The primary key also serves lookups by channel_id
+CREATE TABLE IF NOT EXISTS videos (
+    channel_id  TEXT NOT NULL,
+    video_id    TEXT NOT NULL,
+    title       TEXT,
+    upload_date TEXT,
+    views       INTEGER,
+    likes       INTEGER,
+    comments    INTEGER,
+    fetched_at  REAL,
+    PRIMARY KEY (channel_id, video_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_videos_video_id ON videos (video_id);
+CREATE INDEX IF NOT EXISTS idx_videos_upload_date ON videos (channel_id, upload_date);
+CREATE INDEX IF NOT EXISTS idx_channels_key ON channels (channel_key);
+"""
+
+
+def _int_or_none(value):
+    return None if pd.isna(value) else int(value)
+
+
+class VideoStore:
+    """
+    Embedded SQLite store every scrape writes into, indexed for
+    cross-channel queries (the Parquet cache stays the per-channel
+    fast path).
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call; safe across threads and
+        # gunicorn workers (WAL allows concurrent readers)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_channel(self, channel_id, channel_key, df, channel_url=None,
+                     channel_name=None, channel_logo=None):
+        """
+        Upsert a channel and its videos. Rows without a video_id are skipped.
+        """
+        now = time.time()
+        upload_dates = pd.to_datetime(df["upload_date"], errors="coerce").dt.strftime("%Y-%m-%d")
+
+        rows = [
+            (
+                channel_id,
+                video_id,
+                title if not pd.isna(title) else None,
+                upload_date if not pd.isna(upload_date) else None,
+                _int_or_none(views),
+                _int_or_none(likes),
+                _int_or_none(comments),
+                now,
+            )
+            for video_id, title, upload_date, views, likes, comments in zip(
+                df["video_id"], df["title"], upload_dates,
+                df["views"], df["likes"], df["comments"]
+            )
+            if not pd.isna(video_id)
+        ]
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO channels (channel_id, channel_key, channel_url,
+                                      channel_name, channel_logo, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (channel_id) DO UPDATE SET
+                    channel_key = excluded.channel_key,
+                    channel_url = excluded.channel_url,
+                    channel_name = COALESCE(excluded.channel_name, channel_name),
+                    channel_logo = COALESCE(excluded.channel_logo, channel_logo),
+                    updated_at = excluded.updated_at
+                """,
+                (channel_id, channel_key, channel_url, channel_name, channel_logo, now),
+            )
+            conn.executemany(
+                """
+                INSERT INTO videos (channel_id, video_id, title, upload_date,
+                                    views, likes, comments, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (channel_id, video_id) DO UPDATE SET
+                    title = excluded.title,
+                    upload_date = COALESCE(excluded.upload_date, upload_date),
+                    views = excluded.views,
+                    likes = excluded.likes,
+                    comments = excluded.comments,
+                    fetched_at = excluded.fetched_at
+                """,
+                rows,
+            )
+
+        return len(rows)
+
+    def list_channels(self):
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                """
+                SELECT c.channel_id, c.channel_name, c.channel_url, COUNT(v.video_id) AS videos
+                FROM channels c
+                LEFT JOIN videos v ON v.channel_id = c.channel_id
+                GROUP BY c.channel_id
+                ORDER BY c.updated_at DESC
+                """,
+                conn,
+            )
+
+    def compare_channels(self, channel_ids):
+        """
+        One row per channel: video count, average views/likes/comments
+        per video, and overall like/comment rates (%).
+        """
+        if not channel_ids:
+            return pd.DataFrame()
+
+        placeholders = ", ".join("?" * len(channel_ids))
+
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                f"""
+                SELECT
+                    c.channel_id,
+                    COALESCE(c.channel_name, c.channel_url) AS channel,
+                    COUNT(*) AS videos,
+                    AVG(COALESCE(v.views, 0)) AS views,
+                    AVG(COALESCE(v.likes, 0)) AS likes,
+                    AVG(COALESCE(v.comments, 0)) AS comments,
+                    COALESCE(100.0 * SUM(v.likes) / NULLIF(SUM(v.views), 0), 0) AS like_rate,
+                    COALESCE(100.0 * SUM(v.comments) / NULLIF(SUM(v.views), 0), 0) AS comment_rate
+                FROM videos v
+                JOIN channels c ON c.channel_id = v.channel_id
+                WHERE v.channel_id IN ({placeholders})
+                GROUP BY c.channel_id
+                ORDER BY views DESC
+                """,
+                conn,
+                params=list(channel_ids),
+            )
+
+
+db = VideoStore()
@@ -1,79 +1,387 @@
 import yt_dlp
 import pandas as pd
 import os
-import hashlib
+import threading
+import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from cache_store import store, cache_key
+from metrics import RATE_COLUMNS
+from video_store import db
+import instrumentation
 
 DATA_DIR = "data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
+MAX_WORKERS = 8          # parallel per-video extract_info calls
+VIDEO_TIMEOUT = 30       # seconds allowed for a single video
+RECENT_DAYS = 7          # incremental refresh re-fetches stats for uploads this new
+BATCH_SIZE = 50          # videos per streamed batch / checkpoint
+
+_local = threading.local()
+_pools = {}   # max_workers -> shared ThreadPoolExecutor
+_pools_lock = threading.Lock()
+
 
-def _cache_path(channel_url: str) -> str:
-    return os.path.join(
-        DATA_DIR,
-        hashlib.md5(channel_url.encode("utf-8")).hexdigest() + ".csv"
-    )
+def _videos_url(channel_url):
+    if "/videos" not in channel_url:
+        channel_url = channel_url.rstrip("/") + "/videos"
+    return channel_url
 
 
-def get_channel_videos(channel_url, max_results=10, refresh=False):
+def channel_key(channel_url):
     """
-    SAFE scraper for deployment.
-    NEVER crashes the Dash server.
+    Stable short key for a channel, shared by the cache and the app.
     """
+    return cache_key(_videos_url(channel_url))
 
-    try:
-        if "/videos" not in channel_url:
-            channel_url = channel_url.rstrip("/") + "/videos"
 
-        cache_file = _cache_path(channel_url)
+def _pool(max_workers):
+    """
+    One long-lived pool per worker count, shared by every fetch, so each
+    thread's YoutubeDL (and its HTTP session) is reused across calls.
+    """
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scraper")
+            _pools[max_workers] = pool
+        return pool
 
-        # Load from cache
-        if os.path.exists(cache_file) and not refresh:
-            df = pd.read_csv(cache_file)
-            return df, None, None
 
-        ydl_opts = {
+def _video_ydl(video_timeout):
+    """
+    One YoutubeDL per worker thread (instances are not thread-safe).
+    """
+    ydl = getattr(_local, "ydl", None)
+    if ydl is None or getattr(_local, "timeout", None) != video_timeout:
+        if ydl is not None:
+            ydl.close()
+        ydl = yt_dlp.YoutubeDL({
             "quiet": True,
             "skip_download": True,
-            "extract_flat": True,
-            "playlistend": max_results,
+            "socket_timeout": video_timeout,
+        })
+        _local.ydl = ydl
+        _local.timeout = video_timeout
+    return ydl
+
+
+def _fetch_video(video_id, video_timeout, started=None, slot=None):
+    """
+    Returns (row or None, seconds). None means unavailable/private.
+    If `started` is given, the start time is written to started[slot].
+    """
+    start = time.perf_counter()
+    if started is not None:
+        started[slot] = start
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+
+    try:
+        video_info = _video_ydl(video_timeout).extract_info(video_url, download=False)
+        row = {
+            "video_id": video_id,
+            "title": video_info.get("title"),
+            "upload_date": video_info.get("upload_date"),
+            "views": video_info.get("view_count", 0),
+            "likes": video_info.get("like_count", 0),
+            "comments": video_info.get("comment_count", 0),
         }
+    except Exception:
+        row = None
+        instrumentation.incr("scraper.video_errors")
+
+    elapsed = time.perf_counter() - start
+    instrumentation.record("scraper.extract_info", elapsed)
+
+    return row, elapsed
+
+
+def _fetch_videos(video_ids, max_workers=MAX_WORKERS, video_timeout=VIDEO_TIMEOUT, timings=None):
+    """
+    Fetch metadata for every video id, keeping the original order.
+
+    Runs up to `max_workers` extract_info calls at once on a shared pool
+    (see _pool). Videos that fail, or run longer than `video_timeout`
+    once started, are skipped. If `timings` is a list, one
+    (video_id, seconds, status) tuple is appended per video.
+    """
+    results = [None] * len(video_ids)
+    stats = [None] * len(video_ids)
+
+    if max_workers <= 1:
+        for i, video_id in enumerate(video_ids):
+            row, elapsed = _fetch_video(video_id, video_timeout)
+            results[i] = row
+            stats[i] = (video_id, elapsed, "ok" if row else "error")
+    else:
+        pool = _pool(max_workers)
+        started = [None] * len(video_ids)
+        pending = set()
+        try:
+            futures = {
+                pool.submit(_fetch_video, v, video_timeout, started, i): i
+                for i, v in enumerate(video_ids)
+            }
+            pending = set(futures)
+
+            while pending:
+                done, pending = wait(pending, timeout=min(0.1, video_timeout),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures[future]
+                    row, elapsed = future.result()
+                    results[i] = row
+                    stats[i] = (video_ids[i], elapsed, "ok" if row else "error")
+
+                # Each video is timed from when it actually started, so a
+                # queued video never times out behind a hung one
+                now = time.perf_counter()
+                for future in list(pending):
+                    i = futures[future]
+                    if started[i] is not None and now - started[i] > video_timeout:
+                        pending.discard(future)
+                        stats[i] = (video_ids[i], now - started[i], "timeout")
+        finally:
+            # Drop whatever this call left queued; a hung request keeps its
+            # thread until socket_timeout, but never holds up the caller
+            for future in pending:
+                future.cancel()
+
+    if timings is not None:
+        timings.extend(stats)
+
+    return [row for row in results if row is not None]
+
+
+def _recent_ids(cached_df, recent_days):
+    """
+    Cached video ids uploaded within the last `recent_days` days; an
+    incremental refresh fetches their stats again.
+    """
+    cutoff = pd.Timestamp.now() - pd.Timedelta(days=recent_days)
+    return set(cached_df.loc[cached_df["upload_date"] >= cutoff, "video_id"].dropna())
+
+
+def _merge_incremental(cached_df, video_ids, fetched_df):
+    """
+    Merge freshly fetched rows over the cached ones.
+
+    Rows keep the listing order; cached videos no longer in the listing
+    (older than playlistend) are kept after them.
+    """
+    def records(df):
+        # Derived rates are recomputed for the merged frame
+        return {
+            row["video_id"]: row
+            for row in df.drop(columns=list(RATE_COLUMNS)).to_dict("records")
+            if not pd.isna(row["video_id"])
+        }
+
+    cached_rows = records(cached_df)
+    fetched = records(fetched_df) if not fetched_df.empty else {}
+    listed = set(video_ids)
+    order = list(video_ids) + [v for v in cached_rows if v not in listed]
+
+    # A recent video that failed to refetch keeps its cached stats
+    rows = [fetched.get(v) or cached_rows.get(v) for v in order]
+    return pd.DataFrame([row for row in rows if row is not None])
+
+
+def _channel_meta(channel_info):
+    channel_name = channel_info.get("uploader") or channel_info.get("channel")
+
+    thumbs = channel_info.get("thumbnails", [])
+    channel_logo = thumbs[-1]["url"] if thumbs else None
 
-        videos = []
-        channel_name = None
-        channel_logo = None
+    return channel_name, channel_logo
 
+
+def _channel_record(key, channel_info):
+    channel_name, channel_logo = _channel_meta(channel_info)
+    return {
+        "channel_id": channel_info.get("channel_id") or key,
+        "channel_name": channel_name,
+        "channel_logo": channel_logo,
+    }
+
+
+def _save_to_db(key, channel_url, channel_info, df):
+    """
+    Upsert videos into the SQLite store. A database failure is logged
+    but never loses the cached result.
+    """
+    record = _channel_record(key, channel_info)
+    try:
+        db.save_channel(record["channel_id"], key, df, channel_url,
+                        record["channel_name"], record["channel_logo"])
+    except Exception as e:
+        print("DB ERROR:", e)
+
+
+def _baseline(key):
+    """
+    The cached (possibly expired) frame to diff against, or None if
+    there is none or it predates stored video ids.
+    """
+    cached = store.get(key, allow_stale=True)
+    if cached is None or cached[0]["video_id"].isna().all():
+        return None
+    return cached[0]
+
+
+def iter_channel_videos(channel_url, max_results=None, batch_size=BATCH_SIZE, refresh=False,
+                        max_workers=MAX_WORKERS, video_timeout=VIDEO_TIMEOUT, timings=None,
+                        recent_days=RECENT_DAYS):
+    """
+    Stream a channel as (batch_df, channel_name, channel_logo) tuples.
+
+    The upload listing is read page by page (max_results=None means the
+    whole channel). Each batch of `batch_size` videos is checkpointed to
+    disk and upserted into the SQLite store before it is yielded, so the
+    scraper itself holds one batch at a time, and an interrupted scrape
+    resumes where it stopped (refresh=True starts over). When the
+    listing is exhausted the parts are streamed into the cache entry.
+
+    A fresh cache hit is yielded as one batch; an expired entry is
+    refetched in full. refresh="incremental" yields the cached rows it
+    keeps first, then batches of unseen videos and uploads from the last
+    `recent_days` days (see get_channel_videos).
+
+    Unlike get_channel_videos, listing errors are raised to the caller.
+    """
+    channel_url = _videos_url(channel_url)
+    key = cache_key(channel_url)
+    fetch_kwargs = dict(max_workers=max_workers, video_timeout=video_timeout, timings=timings)
+
+    if not refresh:
+        cached = store.get(key)
+        if cached is not None:
+            df, meta = cached
+            yield df, meta.get("channel_name"), meta.get("channel_logo")
+            return
+
+    baseline = _baseline(key) if refresh == "incremental" else None
+    if baseline is not None:
+        cached_ids = set(baseline["video_id"].dropna())
+        recent = _recent_ids(baseline, recent_days)
+
+    ydl_opts = {
+        "quiet": True,
+        "skip_download": True,
+        "extract_flat": True,
+    }
+
+    # Parts live in a run directory only this scrape owns, so a
+    # concurrent scrape of the same channel can't clobber them
+    checkpoint = store.open_checkpoint(key, resume=refresh is not True)
+    try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            channel_info = ydl.extract_info(channel_url, download=False)
+            # process=False keeps "entries" a lazy generator over listing pages
+            channel_info = ydl.extract_info(channel_url, download=False, process=False)
+            if "entries" not in channel_info and channel_info.get("url"):
+                channel_info = ydl.extract_info(channel_info["url"], download=False, process=False)
 
-            channel_name = channel_info.get("uploader") or channel_info.get("channel")
+            channel_name, channel_logo = _channel_meta(channel_info)
 
-            thumbs = channel_info.get("thumbnails", [])
-            channel_logo = thumbs[-1]["url"] if thumbs else None
+            # Resume: replay finished batches, then skip their videos
+            done = set()
+            for batch in checkpoint:
+                done.update(batch["video_id"].dropna())
+                yield batch, channel_name, channel_logo
 
-            for entry in channel_info.get("entries", []):
-                video_id = entry.get("id")
-                if not video_id:
-                    continue
+            if baseline is not None:
+                kept = baseline[~baseline["video_id"].isin(recent | done)]
+                if not kept.empty:
+                    yield kept.reset_index(drop=True), channel_name, channel_logo
+
+            entries = islice(channel_info.get("entries") or [], max_results)
+            listed = []
 
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
+            while True:
+                page = list(islice(entries, batch_size))
+                if not page:
+                    break
 
-                try:
-                    video_info = ydl.extract_info(video_url, download=False)
+                page_ids = [e.get("id") for e in page if e.get("id")]
+                listed.extend(page_ids)
 
-                    videos.append({
-                        "title": video_info.get("title"),
-                        "views": video_info.get("view_count", 0),
-                        "likes": video_info.get("like_count", 0),
-                        "comments": video_info.get("comment_count", 0),
-                    })
+                video_ids = [v for v in page_ids if v not in done]
+                if baseline is not None:
+                    video_ids = [v for v in video_ids if v not in cached_ids or v in recent]
+                if not video_ids:
+                    continue
 
-                except Exception:
-                    # Skip unavailable/private videos
+                videos = _fetch_videos(video_ids, **fetch_kwargs)
+                if not videos:
                     continue
 
-        df = pd.DataFrame(videos)
-        df.to_csv(cache_file, index=False)
+                batch = checkpoint.add(pd.DataFrame(videos))
+                done.update(batch["video_id"].dropna())
+                _save_to_db(key, channel_url, channel_info, batch)
+                yield batch, channel_name, channel_logo
+
+        meta = _channel_record(key, channel_info)
+
+        if baseline is None:
+            store.put_checkpoint(key, checkpoint, meta=meta)
+        else:
+            # Recent videos that failed to refetch keep their cached stats
+            stale = baseline[baseline["video_id"].isin(recent - done)]
+            if not stale.empty:
+                yield stale.reset_index(drop=True), channel_name, channel_logo
+
+            parts = list(checkpoint)
+            fetched = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+            store.put(key, _merge_incremental(baseline, listed, fetched), meta=meta)
+
+        checkpoint.discard()
+    finally:
+        # Interrupted: keep the parts for the next scrape to resume
+        checkpoint.release()
+
+
+@instrumentation.timed("scraper.get_channel_videos")
+def get_channel_videos(channel_url, max_results=10, refresh=False,
+                       max_workers=MAX_WORKERS, video_timeout=VIDEO_TIMEOUT, timings=None,
+                       recent_days=RECENT_DAYS):
+    """
+    SAFE scraper for deployment.
+    NEVER crashes the Dash server.
+
+    Per-video metadata is fetched concurrently (`max_workers`, 1 = sequential),
+    each video limited to `video_timeout` seconds. Pass a list as `timings`
+    to collect (video_id, seconds, status) for every video.
+
+    Results are cached (see cache_store) until their TTL expires, then
+    refetched. refresh=True ignores the cached entry and refetches
+    everything. refresh="incremental" diffs the channel listing against
+    the cached (possibly expired) entry and only fetches unseen videos
+    plus uploads from the last `recent_days` days.
+
+    Fetches go through iter_channel_videos and are collected here.
+    """
+
+    try:
+        channel_url = _videos_url(channel_url)
+        key = cache_key(channel_url)
+
+        channel_name = channel_logo = None
+        batches = []
+        for batch, channel_name, channel_logo in iter_channel_videos(
+            channel_url, max_results, refresh=refresh, recent_days=recent_days,
+            max_workers=max_workers, video_timeout=video_timeout, timings=timings
+        ):
+            batches.append(batch)
+
+        if refresh == "incremental" and batches:
+            # Batches arrive cached rows first; the stored entry is in listing order
+            cached = store.get(key, allow_stale=True)
+            if cached is not None:
+                return cached[0], channel_name, channel_logo
 
+        df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
         return df, channel_name, channel_logo
 
     except Exception as e: